@@ -1,3 +1,6 @@
+import unittest
+from unittest import mock
+
 from migen import *
 
 from litex.soc.interconnect.csr import AutoCSR, CSR, CSRStatus, CSRStorage
@@ -15,7 +18,39 @@ class StreamableHyperRAM(Module, AutoCSR):
         self.submodules.hyperram = hyperram = HyperRAMX2(hyperram_pads)
         devices = [d.bus for d in devices]
         
-        self.submodules.arbiter = Arbiter(devices + [cpu_bus], hyperram.bus)
+        # Register read data between the core and the arbiter so the 32-bit
+        # dat_r from the core's IDDRs doesn't route combinationally to every
+        # master. The read ack is delayed to match, but the core's bus.ack is
+        # still ORed in for writes (burst writes need it), so the RWDS strobe
+        # keeps a combinational path to the masters until the core drives its
+        # write ack separately from the READ-ACK strobe.
+        # Reads must be single beat: the core has to leave READ-ACK right after
+        # its ack, as cyc/stb are masked while the delayed ack is presented.
+        # A core that keeps CTI=010 read bursts open (StreamReader issues them)
+        # needs this wrapper changed when litehyperbus is bumped.
+        core_bus = Interface()
+        self.submodules.arbiter = Arbiter(devices + [cpu_bus], core_bus)
+
+        read_ack = Signal()
+        dat_r = Signal(32)
+        self.comb += [
+            hyperram.bus.adr.eq(core_bus.adr),
+            hyperram.bus.dat_w.eq(core_bus.dat_w),
+            hyperram.bus.sel.eq(core_bus.sel),
+            hyperram.bus.we.eq(core_bus.we),
+            hyperram.bus.cti.eq(core_bus.cti),
+            hyperram.bus.bte.eq(core_bus.bte),
+            hyperram.bus.cyc.eq(core_bus.cyc & ~read_ack),
+            hyperram.bus.stb.eq(core_bus.stb & ~read_ack),
+
+            core_bus.dat_r.eq(dat_r),
+            core_bus.ack.eq((hyperram.bus.ack & hyperram.bus.we) | read_ack),
+            core_bus.err.eq(hyperram.bus.err),
+        ]
+        self.sync += [
+            read_ack.eq(hyperram.bus.ack & ~hyperram.bus.we & core_bus.cyc & core_bus.stb),
+            dat_r.eq(hyperram.bus.dat_r),
+        ]
         
         # Analyser signals for debug
         self.dbg = hyperram.dbg
@@ -37,4 +72,104 @@ class StreamableHyperRAM(Module, AutoCSR):
             hyperram.dly_clk.move.eq(self.clk_move.storage),
             hyperram.dly_clk.direction.eq(self.clk_direction.storage),
         ]
-     
+
+
+class TestStreamableHyperRAM(unittest.TestCase):
+
+    class StubHyperRAM(Module):
+        def __init__(self, pads):
+            self.bus = Interface()
+            self.dbg = []
+            self.dly_io = Record([("loadn", 1), ("move", 1), ("direction", 1)])
+            self.dly_clk = Record([("loadn", 1), ("move", 1), ("direction", 1)])
+
+    class Master:
+        def __init__(self):
+            self.bus = Interface()
+
+    def run_dut(self, generator, n_devices=0):
+        with mock.patch(__name__ + ".HyperRAMX2", self.StubHyperRAM):
+            masters = [self.Master() for _ in range(n_devices)]
+            dut = StreamableHyperRAM(None, devices=masters)
+        run_simulation(dut, generator(dut, [m.bus for m in masters] + [dut.bus]))
+
+    def test_read_ack_registered(self):
+        def gen(dut, buses):
+            bus, core = buses[0], dut.hyperram.bus
+            yield bus.adr.eq(0x10)
+            yield bus.cyc.eq(1)
+            yield bus.stb.eq(1)
+            yield
+            yield
+            self.assertEqual((yield core.stb), 1)
+
+            yield core.ack.eq(1)
+            yield core.dat_r.eq(0xcafe)
+            yield
+            self.assertEqual((yield core.ack), 1)
+            self.assertEqual((yield bus.ack), 0)
+
+            yield core.ack.eq(0)
+            yield core.dat_r.eq(0)
+            yield
+            self.assertEqual((yield bus.ack), 1)
+            self.assertEqual((yield bus.dat_r), 0xcafe)
+            self.assertEqual((yield core.stb), 0)
+
+            yield bus.cyc.eq(0)
+            yield bus.stb.eq(0)
+            yield
+            self.assertEqual((yield bus.ack), 0)
+
+        self.run_dut(gen)
+
+    def test_write_ack_combinational(self):
+        def gen(dut, buses):
+            bus, core = buses[0], dut.hyperram.bus
+            yield bus.we.eq(1)
+            yield bus.cyc.eq(1)
+            yield bus.stb.eq(1)
+            yield
+            yield
+
+            yield core.ack.eq(1)
+            yield
+            self.assertEqual((yield bus.ack), 1)
+
+            yield core.ack.eq(0)
+            yield bus.cyc.eq(0)
+            yield bus.stb.eq(0)
+            yield
+            self.assertEqual((yield bus.ack), 0)
+
+        self.run_dut(gen)
+
+    def test_orphan_ack_not_forwarded(self):
+        def gen(dut, buses):
+            m0, m1, core = buses[0], buses[1], dut.hyperram.bus
+            yield m0.cyc.eq(1)
+            yield m0.stb.eq(1)
+            yield m1.cyc.eq(1)
+            yield m1.stb.eq(1)
+            yield
+            yield
+
+            # m0 holds the grant and withdraws in the cycle the core acks
+            yield core.ack.eq(1)
+            yield m0.cyc.eq(0)
+            yield m0.stb.eq(0)
+            yield
+            self.assertEqual((yield core.ack), 1)
+            self.assertEqual((yield m0.cyc), 0)
+
+            yield core.ack.eq(0)
+            for _ in range(4):
+                yield
+                self.assertEqual((yield m0.ack), 0)
+                self.assertEqual((yield m1.ack), 0)
+
+        self.run_dut(gen, n_devices=1)
+
+
+if __name__ == '__main__':
+    unittest.main()